@@ -1,5 +1,6 @@
 import streamlit as st
-import os
+import re
+from embeddings import load_embedding_model
 from query import AgriAssistQuery
 
 # PAGE CONFIG
@@ -9,8 +10,7 @@ st.set_page_config(
     layout="wide"
 )
 
-st.markdown(
-    """
+CSS = """
     <style>
     .main-container {
         padding: 20px;
@@ -53,9 +53,17 @@ st.markdown(
         color: #FF9600 !important;
     }
     </style>
-    """,
-    unsafe_allow_html=True
-)
+    """
+
+@st.cache_data
+def get_css():
+    # Minified once per process: the block must be re-emitted on every
+    # rerun (Streamlit drops elements a rerun doesn't write), so keep it small.
+    css = re.sub(r"/\*.*?\*/", "", CSS, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};:,>])\s*", r"\1", css).strip()
+
+st.markdown(get_css(), unsafe_allow_html=True)
 
 
 # --------------------------------------------------------------
@@ -66,9 +74,17 @@ st.title("🌾 AgriAssist — Smart Agriculture Q&A with Gemini 2.5 Pro")
 # --------------------------------------------------------------
 # 🌿 INITIALIZE SYSTEM (cached)
 # --------------------------------------------------------------
+@st.cache_resource
+def get_embedder():
+    # One MiniLM instance per process, shared across sessions
+    return load_embedding_model()
+
 @st.cache_resource
 def load_system():
-    return AgriAssistQuery()
+    qa = AgriAssistQuery(embedding_model=get_embedder())
+    # Runs once per process, so the first user query skips the cold index load
+    qa.warmup()
+    return qa
 
 qa_system = load_system()
 
@@ -100,10 +116,12 @@ if st.button("Get Answer", use_container_width=True):
 
     # Process Query
     with st.spinner("🌱 Thinking… Fetching info from PDFs + Gemini…"):
-        response = qa_system.answer_query(
-            question=user_question,
-            location=location,
-            include_weather=include_weather
+        response = qa_system.run_async(
+            qa_system.aanswer_query(
+                question=user_question,
+                location=location,
+                include_weather=include_weather
+            )
         )
 
     # ----------------------------------------------------------
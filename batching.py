@@ -0,0 +1,71 @@
+import asyncio
+
+# Coalescing window for concurrent generation requests
+MAX_BATCH_SIZE = 16
+MAX_BATCH_WAIT = 0.03  # seconds
+
+
+# --------- DYNAMIC BATCHING QUEUE ---------
+class DynamicBatcher:
+    def __init__(self, handler, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_BATCH_WAIT):
+        # handler: async fn(list[item]) -> list[result | Exception]
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = None
+        self._worker = None
+        self._loop = None
+        # The loop only holds weak refs to tasks — keep in-flight ones alive
+        self._inflight = set()
+
+    async def submit(self, item):
+        # Queue + worker live on the submitting loop; rebuild them when a
+        # new loop shows up (e.g. successive asyncio.run calls), since the
+        # old worker died with its loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._collect())
+
+        future = loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+
+            # A lone request has nothing to coalesce with — send it right
+            # away. Under load, flush when the batch is full or the oldest
+            # request has waited long enough.
+            if not self._queue.empty():
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+            # Dispatch without blocking collection of the next batch
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch):
+        try:
+            results = await self.handler([item for item, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
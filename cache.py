@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import sqlite3
+import threading
+import chromadb
+from collections import OrderedDict
+import numpy as np
+
+# Exact prompt → answer cache
+LLM_CACHE_FILE = ".llm_cache.db"
+
+# Paraphrase-tolerant question → result cache (own Chroma store, kept
+# out of the corpus DB so answers never land in the committed db/ folder)
+QA_CACHE_DIRECTORY = ".qa_cache"
+QA_CACHE_COLLECTION = "qa_cache"
+SEMANTIC_THRESHOLD = 0.92
+# Weather-aware answers go stale, so entries expire
+QA_CACHE_TTL = 6 * 60 * 60
+# ...and weather-aware ones only live for the forecast's hour
+WEATHER_BUCKET_SECONDS = 60 * 60
+
+# In-process LRU in front of the Chroma cache (stricter match)
+MEMORY_CACHE_CAPACITY = 256
+MEMORY_CACHE_THRESHOLD = 0.95
+
+# Retrieved chunks per query embedding (documents must truly match)
+DOC_CACHE_CAPACITY = 1024
+DOC_CACHE_THRESHOLD = 0.97
+
+
+def normalize(embedding):
+    v = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+def weather_hour():
+    # Same bucket the forecast memo in query.py is keyed by
+    return int(time.time() // WEATHER_BUCKET_SECONDS)
+
+def answer_scope(location, include_weather):
+    # Answers that quote weather only match within the hour they were
+    # generated in, so a hit never shows an older forecast as current
+    hour = weather_hour() if include_weather else -1
+    return (location.strip().lower(), bool(include_weather), hour)
+
+
+# --------- EXACT LLM RESPONSE CACHE (SQLITE) ---------
+class LLMCache:
+    def __init__(self, path=LLM_CACHE_FILE):
+        # Streamlit serves sessions from several threads
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache "
+            "(key TEXT PRIMARY KEY, response TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _key(prompt):
+        return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    def get(self, prompt):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM llm_cache WHERE key = ?",
+                (self._key(prompt),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, prompt, response):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response) VALUES (?, ?)",
+                (self._key(prompt), response)
+            )
+            self._conn.commit()
+
+
+# --------- IN-MEMORY SEMANTIC LRU CACHE ---------
+class SemanticLRUCache:
+    def __init__(self, capacity=MEMORY_CACHE_CAPACITY,
+                 threshold=MEMORY_CACHE_THRESHOLD, ttl=QA_CACHE_TTL):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # key → slot, in recency order. Only entries with an equal
+        # scope (e.g. location + weather) can match a lookup.
+        self._slots = OrderedDict()
+        # Struct-of-arrays storage: row `slot` of one preallocated
+        # (capacity × dim) matrix holds that entry's unit vector, so a
+        # lookup is a single contiguous matrix-vector product.
+        self._vecs = None
+        self._valid = np.zeros(capacity, dtype=bool)
+        self._meta = [None] * capacity  # slot → (key, scope, created, result)
+        self._free = []
+        self._used = 0  # high-water mark of slots ever handed out
+
+    def _release(self, slot):
+        key = self._meta[slot][0]
+        del self._slots[key]
+        self._valid[slot] = False
+        self._meta[slot] = None
+        self._free.append(slot)
+
+    def get(self, query_embedding, scope=None):
+        q = normalize(query_embedding)
+        now = time.time()
+
+        with self._lock:
+            if not self._slots:
+                return None
+
+            n = self._used
+            sims = self._vecs[:n] @ q
+            sims[~self._valid[:n]] = -np.inf
+
+            expired = []
+            hit = None
+            for slot in np.argsort(-sims):
+                if sims[slot] < self.threshold:
+                    break
+                key, entry_scope, created, result = self._meta[slot]
+                if self.ttl is not None and now - created > self.ttl:
+                    expired.append(slot)
+                elif entry_scope == scope:
+                    self._slots.move_to_end(key)
+                    hit = result
+                    break
+
+            for slot in expired:
+                self._release(slot)
+            return hit
+
+    def put(self, query_embedding, result, scope=None, created=None):
+        q = normalize(query_embedding)
+
+        with self._lock:
+            if self._vecs is None:
+                self._vecs = np.zeros((self.capacity, q.shape[0]), dtype=np.float32)
+
+            key = (scope, q.tobytes())
+            if key in self._slots:
+                slot = self._slots[key]
+            elif self._free:
+                slot = self._free.pop()
+            elif self._used < self.capacity:
+                slot = self._used
+                self._used += 1
+            else:
+                # Evict least recently used, reuse its row
+                slot = next(iter(self._slots.values()))
+                self._release(slot)
+                self._free.remove(slot)
+
+            self._vecs[slot] = q
+            self._valid[slot] = True
+            self._meta[slot] = (key, scope, created or time.time(), result)
+            self._slots[key] = slot
+            self._slots.move_to_end(key)
+
+
+# --------- SEMANTIC ANSWER CACHE (CHROMA) ---------
+def clear_answer_cache(path=QA_CACHE_DIRECTORY):
+    # Cached answers cite chunks of the old corpus — drop them on re-ingest
+    if not os.path.exists(path):
+        return
+    client = chromadb.PersistentClient(path=path)
+    if QA_CACHE_COLLECTION in [c if isinstance(c, str) else c.name for c in client.list_collections()]:
+        client.delete_collection(QA_CACHE_COLLECTION)
+
+class SemanticAnswerCache:
+    def __init__(self, path=QA_CACHE_DIRECTORY, threshold=SEMANTIC_THRESHOLD, ttl=QA_CACHE_TTL):
+        self.threshold = threshold
+        self.ttl = ttl
+        client = chromadb.PersistentClient(path=path)
+        self.collection = client.get_or_create_collection(
+            QA_CACHE_COLLECTION,
+            metadata={"hnsw:space": "cosine"}
+        )
+
+    @staticmethod
+    def _where(location, include_weather, min_created):
+        location, include_weather, hour = answer_scope(location, include_weather)
+        return {
+            "$and": [
+                {"location": location},
+                {"include_weather": include_weather},
+                {"hour": hour},
+                {"created": {"$gte": min_created}},
+            ]
+        }
+
+    def lookup(self, query_embedding, location, include_weather):
+        if self.collection.count() == 0:
+            return None
+
+        hits = self.collection.query(
+            query_embeddings=[query_embedding],
+            n_results=1,
+            where=self._where(location, include_weather, time.time() - self.ttl),
+            include=["metadatas", "distances"],
+        )
+        if not hits["ids"] or not hits["ids"][0]:
+            return None
+
+        # Cosine distance → similarity
+        if 1.0 - hits["distances"][0][0] < self.threshold:
+            return None
+
+        meta = hits["metadatas"][0][0]
+        return json.loads(meta["result"]), meta["created"]
+
+    def add(self, question, query_embedding, location, include_weather, result):
+        now = time.time()
+        location, include_weather, hour = answer_scope(location, include_weather)
+
+        # Expired rows can never match again — drop them as we write
+        self.collection.delete(where={
+            "$or": [
+                {"created": {"$lt": now - self.ttl}},
+                {"$and": [{"include_weather": True}, {"hour": {"$lt": weather_hour()}}]},
+            ]
+        })
+
+        self.collection.add(
+            ids=[str(uuid.uuid4())],
+            embeddings=[query_embedding],
+            documents=[question],
+            metadatas=[{
+                "location": location,
+                "include_weather": include_weather,
+                "hour": hour,
+                "created": now,
+                "result": json.dumps(result),
+            }],
+        )
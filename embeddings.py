@@ -0,0 +1,227 @@
+import os
+import json
+import functools
+
+# Let the HF Rust tokenizer use every core (must be set before importing transformers)
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_community.embeddings import SentenceTransformerEmbeddings
+
+# Model + ONNX export location
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX_DIRECTORY = "onnx_minilm"
+ONNX_MODEL_FILE = "model_quantized.onnx"
+
+# all-MiniLM-L6-v2 was trained with 256-token inputs, outputs 384-d vectors
+MAX_SEQ_LENGTH = 256
+EMBEDDING_DIM = 384
+
+# Raw chunk vectors saved next to Chroma at ingest (row i ↔ ids[i])
+VECTORS_FILE = "embeddings.npy"
+IDS_FILE = "ids.json"
+# Optional FAISS index over the same rows
+FAISS_INDEX_FILE = "faiss.index"
+FAISS_NPROBE = 16
+FAISS_EF_SEARCH = 64
+
+
+# --------- CPU THREADING ---------
+def num_threads():
+    return int(os.environ.get("OMP_NUM_THREADS", os.cpu_count() or 2))
+
+def configure_torch_threads():
+    import torch
+
+    # Many cloud containers default torch to a single intra-op thread
+    torch.set_num_threads(num_threads())
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only settable once, before any inter-op work has started
+        pass
+
+
+# --------- ONNX RUNTIME INT8 ENCODER ---------
+class ONNXMiniLM(Embeddings):
+    def __init__(self, model_dir=ONNX_DIRECTORY, batch_size=64):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads()
+
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, ONNX_MODEL_FILE),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, texts):
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=MAX_SEQ_LENGTH,
+            return_tensors="np",
+        )
+        feed = {
+            name: value.astype(np.int64)
+            for name, value in encoded.items()
+            if name in self._input_names
+        }
+        token_embeddings = self.session.run(None, feed)[0]
+
+        # Mean-pool over real (non-pad) tokens, then L2-normalize
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def encode(self, texts, batch_size=None):
+        if not texts:
+            # np.concatenate([]) raises; match the Torch backend instead
+            return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+
+        batch_size = batch_size or self.batch_size
+        batches = [
+            self._encode_batch(texts[i:i + batch_size])
+            for i in range(0, len(texts), batch_size)
+        ]
+        return np.concatenate(batches).astype(np.float32)
+
+    def embed_documents(self, texts):
+        return self.encode(list(texts)).tolist()
+
+    def embed_query(self, text):
+        return self.encode([text])[0].tolist()
+
+
+# --------- PYTORCH FP32 FALLBACK ---------
+class TorchMiniLM(SentenceTransformerEmbeddings):
+    # inference_mode skips autograd bookkeeping entirely (cheaper than no_grad)
+    def embed_documents(self, texts):
+        import torch
+
+        with torch.inference_mode():
+            return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        import torch
+
+        with torch.inference_mode():
+            return super().embed_query(text)
+
+
+# --------- ENCODE TO NUMPY (ANY BACKEND) ---------
+def encode_texts(embedding_model, texts, batch_size=64):
+    if isinstance(embedding_model, ONNXMiniLM):
+        return embedding_model.encode(texts, batch_size=batch_size)
+
+    import torch
+
+    with torch.inference_mode():
+        return embedding_model.client.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+
+
+# --------- LOAD EMBEDDING MODEL (ONE PER PROCESS) ---------
+@functools.lru_cache(maxsize=1)
+def load_embedding_model():
+    if os.path.exists(os.path.join(ONNX_DIRECTORY, ONNX_MODEL_FILE)):
+        try:
+            model = ONNXMiniLM()
+            print("✅ Using ONNX Runtime INT8 embeddings")
+            return model
+        except ImportError as e:
+            print(f"⚠️ ONNX Runtime unavailable ({e}), using PyTorch embeddings")
+
+    model = TorchMiniLM(model_name="all-MiniLM-L6-v2")
+    model.client.eval()
+    return model
+
+
+# --------- PERSISTED VECTOR MATRIX ---------
+def load_vectors_mmap(directory):
+    vectors_path = os.path.join(directory, VECTORS_FILE)
+    ids_path = os.path.join(directory, IDS_FILE)
+    if not (os.path.exists(vectors_path) and os.path.exists(ids_path)):
+        return None, None
+
+    with open(ids_path) as f:
+        ids = json.load(f)
+    return np.load(vectors_path, mmap_mode="r"), ids
+
+
+def load_faiss_index(directory):
+    index_path = os.path.join(directory, FAISS_INDEX_FILE)
+    if not os.path.exists(index_path):
+        return None
+
+    try:
+        import faiss
+    except ImportError:
+        return None
+
+    index = faiss.downcast_index(faiss.read_index(index_path))
+    # Search-time knobs aren't stored in the file
+    if hasattr(index, "nprobe"):
+        index.nprobe = FAISS_NPROBE
+    elif hasattr(index, "hnsw"):
+        index.hnsw.efSearch = FAISS_EF_SEARCH
+    return index
+
+
+# --------- EXPORT + QUANTIZE (RUN ONCE) ---------
+def _cpu_has_vnni():
+    try:
+        with open("/proc/cpuinfo") as f:
+            return "avx512_vnni" in f.read()
+    except OSError:
+        return False
+
+def export_onnx_model(output_dir=ONNX_DIRECTORY, model_name=MODEL_NAME):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    print(f"📦 Exporting {model_name} to ONNX...")
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+
+    if _cpu_has_vnni():
+        # VNNI-tuned dynamic INT8 (per-channel weights, int8 GEMM kernels)
+        print("⚙️ Quantizing weights to INT8 (AVX-512 VNNI)...")
+        quantizer = ORTQuantizer.from_pretrained(output_dir)
+        quantizer.quantize(
+            save_dir=output_dir,
+            quantization_config=AutoQuantizationConfig.avx512_vnni(
+                is_static=False, per_channel=True
+            ),
+        )
+    else:
+        print("⚙️ Quantizing weights to INT8...")
+        quantize_dynamic(
+            os.path.join(output_dir, "model.onnx"),
+            os.path.join(output_dir, ONNX_MODEL_FILE),
+            weight_type=QuantType.QInt8,
+        )
+
+    print(f"✅ ONNX model saved to '{output_dir}'")
+
+
+if __name__ == "__main__":
+    export_onnx_model()
@@ -1,19 +1,113 @@
+import os
 import sys
-from langchain_community.document_loaders import PyPDFDirectoryLoader
+import gc
+import json
+import uuid
+import pickle
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import chromadb
+from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import SentenceTransformerEmbeddings
-from langchain_community.vectorstores import Chroma
+from embeddings import (
+    FAISS_INDEX_FILE,
+    IDS_FILE,
+    VECTORS_FILE,
+    configure_torch_threads,
+    encode_texts,
+    load_embedding_model,
+)
+from cache import QA_CACHE_COLLECTION, clear_answer_cache
+
+configure_torch_threads()
 
 # Directories
 DB_DIRECTORY = "db"
 DATA_DIRECTORY = "data/"
 
+# Same collection name LangChain's Chroma wrapper reads from in query.py
+COLLECTION_NAME = "langchain"
+
+# Parsed pages per PDF, keyed by (path, mtime, size)
+PDF_CACHE_FILE = ".pdfcache.pkl"
+# Split chunks for the last set of pages + splitter settings
+CHUNK_CACHE_FILE = ".chunks.pkl"
+
+# Splitter settings
+CHUNK_SIZE = 400
+CHUNK_OVERLAP = 50
+
+# Embedding batch size (chunks are length-sorted before batching)
+EMBED_BATCH_SIZE = 64
+# Chunks embedded + written to Chroma per step (bounds peak memory)
+INGEST_BATCH_SIZE = 256
+
+# FAISS: HNSW graph for small corpora, compressed IVF-PQ beyond this
+FAISS_IVF_MIN_VECTORS = 100_000
+FAISS_HNSW_M = 32
+
+# --------- PDF PARSE CACHE ---------
+def _pdf_key(path):
+    stat = os.stat(path)
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+def _parse_pdf(path):
+    return PyPDFLoader(path).load()
+
+def _parse_pdfs(paths):
+    # pypdf is pure Python, so spread files across processes;
+    # a single file isn't worth the worker start-up cost.
+    if len(paths) == 1:
+        return [_parse_pdf(paths[0])]
+
+    workers = min(len(paths), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_parse_pdf, paths))
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        # Missing, truncated, or pickled by an older langchain — it's only
+        # a cache, so treat any failure as a miss
+        return {}
+
+def _save_cache(cache_path, cache):
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+
 # --------- LOAD PDF DOCUMENTS ---------
 def load_documents(directory_path=DATA_DIRECTORY):
     print(f"📄 Loading PDFs from: {directory_path}")
 
-    loader = PyPDFDirectoryLoader(directory_path)
-    documents = loader.load()
+    paths = sorted(
+        os.path.join(root, name)
+        for root, _, files in os.walk(directory_path)
+        for name in files
+        if name.lower().endswith(".pdf")
+    )
+    keys = {path: _pdf_key(path) for path in paths}
+
+    cache_path = os.path.join(directory_path, PDF_CACHE_FILE)
+    cache = _load_cache(cache_path)
+
+    # Only new or modified PDFs get parsed again
+    missing = [path for path in paths if keys[path] not in cache]
+    if missing:
+        print(f"📑 Parsing {len(missing)} new/changed PDF(s)...")
+        for path, pages in zip(missing, _parse_pdfs(missing)):
+            cache[keys[path]] = pages
+
+    # Drop entries for deleted or replaced files
+    fresh_cache = {keys[path]: cache[keys[path]] for path in paths}
+    if missing or len(fresh_cache) != len(cache):
+        _save_cache(cache_path, fresh_cache)
+
+    documents = [doc for path in paths for doc in fresh_cache[keys[path]]]
 
     if not documents:
         print(f"❌ No PDFs found in '{directory_path}'")
@@ -24,40 +118,169 @@ def load_documents(directory_path=DATA_DIRECTORY):
     return documents
 
 # --------- SPLIT DOCUMENTS INTO CHUNKS (OPTIMIZED) ---------
-def split_documents_into_chunks(documents):
+def _chunk_cache_key(documents):
+    # Hashing the page text runs in C — far cheaper than re-splitting it
+    h = hashlib.sha1(f"{CHUNK_SIZE}:{CHUNK_OVERLAP}".encode())
+    for d in documents:
+        h.update(str(d.metadata.get("source", "")).encode())
+        h.update(str(d.metadata.get("page", 0)).encode())
+        h.update(d.page_content.encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+def split_documents_into_chunks(documents, directory_path=DATA_DIRECTORY):
     print("✂️ Splitting into optimized chunks...")
 
+    cache_path = os.path.join(directory_path, CHUNK_CACHE_FILE)
+    key = _chunk_cache_key(documents)
+    cached = _load_cache(cache_path)
+    if cached.get("key") == key:
+        texts, sources, pages = cached["chunks"]
+        print(f"✅ Reused {len(texts)} cached chunks.")
+        return texts, sources, pages
+
     # Smaller chunks = MUCH better results for FLAN-T5
     text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=400,
-        chunk_overlap=50
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
     )
 
     chunks = text_splitter.split_documents(documents)
-    print(f"✅ Created {len(chunks)} chunks.")
-    return chunks
+
+    # Collapse Document objects into parallel arrays (struct-of-arrays);
+    # thousands of chunks share a handful of PDF paths, so intern them.
+    texts = [c.page_content for c in chunks]
+    sources = [sys.intern(c.metadata.get("source", "")) for c in chunks]
+    pages = np.fromiter(
+        (c.metadata.get("page", 0) for c in chunks),
+        dtype=np.int32,
+        count=len(chunks),
+    )
+    del chunks
+
+    _save_cache(cache_path, {"key": key, "chunks": (texts, sources, pages)})
+
+    print(f"✅ Created {len(texts)} chunks.")
+    return texts, sources, pages
+
+# --------- OPTIONAL FAISS INDEX ---------
+def build_faiss_index(vectors):
+    try:
+        import faiss
+    except ImportError:
+        print("ℹ️ faiss not installed — skipping FAISS index")
+        return None
+
+    # Unit vectors + inner product: cosine without a per-vector divide
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    faiss.normalize_L2(vectors)
+    dim = vectors.shape[1]
+
+    if len(vectors) < FAISS_IVF_MIN_VECTORS:
+        index = faiss.IndexHNSWFlat(dim, FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    else:
+        # 64 sub-quantizers → 64 bytes per vector instead of 4 × 384
+        index = faiss.index_factory(dim, "IVF1024,PQ64", faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+    index.add(vectors)
+
+    faiss.write_index(index, os.path.join(DB_DIRECTORY, FAISS_INDEX_FILE))
+    print(f"✅ FAISS index saved ({type(index).__name__})")
+    return index
 
 # --------- CREATE + SAVE VECTOR DATABASE ---------
-def create_vector_database(chunks):
+def create_vector_database(chunks, embedding_model=None):
     print("🔍 Creating vector database...")
 
-    embedding_model = SentenceTransformerEmbeddings(
-        model_name="all-MiniLM-L6-v2"
-    )
+    embedding_model = embedding_model or load_embedding_model()
+
+    # Talk to Chroma directly: vectors are precomputed numpy arrays,
+    # so the LangChain wrapper would only add per-chunk conversions.
+    client = chromadb.PersistentClient(path=DB_DIRECTORY)
+
+    # Rebuild from scratch so re-running ingest doesn't duplicate chunks
+    # (older DBs also hold a qa_cache collection — drop that too)
+    existing = [c if isinstance(c, str) else c.name for c in client.list_collections()]
+    for name in (COLLECTION_NAME, QA_CACHE_COLLECTION):
+        if name in existing:
+            client.delete_collection(name)
 
-    db = Chroma.from_documents(
-        chunks,
-        embedding_model,
-        persist_directory=DB_DIRECTORY
+    # Cached answers and citations refer to the old corpus
+    clear_answer_cache()
+    # Vectors are L2-normalized, so inner product == cosine similarity
+    collection = client.get_or_create_collection(
+        COLLECTION_NAME, metadata={"hnsw:space": "ip"}
     )
 
-    print(f"✅ Vector DB saved to '{DB_DIRECTORY}'")
-    return db
+    # Old vector files no longer match the rebuilt collection
+    for name in (IDS_FILE, FAISS_INDEX_FILE):
+        stale_path = os.path.join(DB_DIRECTORY, name)
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+
+    texts, sources, pages = chunks
+
+    # Display names for citations, computed once per PDF
+    basenames = {src: os.path.basename(src) for src in set(sources)}
+
+    # Sorting by length keeps each batch padded to a similar size,
+    # so the encoder wastes far fewer FLOPs on pad tokens.
+    order = np.argsort([len(t) for t in texts], kind="stable")
+
+    # Vectors are also kept as a float32 matrix on disk (row i ↔ ids[i])
+    # so they can be reused without running the encoder again.
+    vectors = None
+    all_ids = []
+
+    # Embed + write in slabs so only one batch of vectors is resident
+    for start in range(0, len(order), INGEST_BATCH_SIZE):
+        batch = order[start:start + INGEST_BATCH_SIZE]
+        batch_texts = [texts[i] for i in batch]
+        ids = [str(uuid.uuid4()) for _ in batch]
+        embeddings = encode_texts(embedding_model, batch_texts, EMBED_BATCH_SIZE)
+
+        collection.add(
+            ids=ids,
+            embeddings=embeddings,
+            documents=batch_texts,
+            metadatas=[
+                {
+                    "source": sources[i],
+                    "basename": basenames[sources[i]],
+                    "page": int(pages[i]),
+                }
+                for i in batch
+            ],
+        )
+
+        if vectors is None:
+            vectors = np.lib.format.open_memmap(
+                os.path.join(DB_DIRECTORY, VECTORS_FILE),
+                mode="w+",
+                dtype=np.float32,
+                shape=(len(order), embeddings.shape[1]),
+            )
+        vectors[start:start + len(batch)] = embeddings
+        all_ids.extend(ids)
+
+        del batch, batch_texts, embeddings
+        gc.collect()
+        print(f"   ↳ {min(start + INGEST_BATCH_SIZE, len(order))}/{len(order)} chunks")
+
+    if vectors is not None:
+        vectors.flush()
+        build_faiss_index(vectors)
+        del vectors
+        with open(os.path.join(DB_DIRECTORY, IDS_FILE), "w") as f:
+            json.dump(all_ids, f)
+
+    print(f"✅ Vector DB saved to '{DB_DIRECTORY}' ({collection.count()} chunks)")
+    return collection
 
 # --------- MAIN EXECUTION ---------
 if __name__ == "__main__":
     docs = load_documents()
     chunks = split_documents_into_chunks(docs)
+    del docs  # free parsed pages before embedding
     create_vector_database(chunks)
 
     print("\n🎉 DONE — Your database is ready!")
@@ -1,14 +1,69 @@
 import os
+import re
+import json
+import asyncio
+import functools
+import threading
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
+from langchain_core.documents import Document
 from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import SentenceTransformerEmbeddings
+from embeddings import (
+    configure_torch_threads,
+    load_embedding_model,
+    load_faiss_index,
+    load_vectors_mmap,
+)
+from cache import (
+    DOC_CACHE_CAPACITY,
+    DOC_CACHE_THRESHOLD,
+    LLMCache,
+    SemanticAnswerCache,
+    SemanticLRUCache,
+    answer_scope,
+    weather_hour,
+)
+from batching import DynamicBatcher
 from dotenv import load_dotenv
 import google.generativeai as genai
 
+try:
+    # Faster decode straight from response bytes
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
 load_dotenv()
 
+# Before any model is loaded
+configure_torch_threads()
+
 DB_DIRECTORY = "db"
 
+# Persisted city → (lat, lon) lookups
+GEO_CACHE_FILE = os.path.join(DB_DIRECTORY, "geo_cache.json")
+
+# Longest the sync path waits on the background weather fetch
+WEATHER_WAIT_TIMEOUT = 12
+
+# Per-chunk context trimming before it goes into the prompt
+MAX_CONTEXT_CHARS = 800
+FINGERPRINT_CHARS = 200
+_WHITESPACE = re.compile(r"\s+")
+
+# Cap on concurrent in-flight Gemini requests
+MAX_INFLIGHT_GENERATIONS = 16
+
+# Parallel Chroma queries for batches of cache misses
+SEARCH_SHARDS = 4
+
+# Corpora up to this size are searched exactly with one matrix product
+BRUTE_FORCE_MAX_VECTORS = 20000
+
 # Weather code → human readable description
 WEATHER_CODES = {
     0: "Clear sky",
@@ -29,8 +84,107 @@ WEATHER_CODES = {
     95: "Thunderstorm",
 }
 
+# Static prompt scaffold — only the three fields change per question
+PROMPT_TEMPLATE = """
+You are AgriAssist, an agricultural expert for Indian farmers.
+Provide clear, practical, and reliable guidance based ONLY on the given PDF context and weather.
+
+-------------------------
+📘 PDF CONTEXT:
+{context}
+
+-------------------------
+🌦 WEATHER CONTEXT:
+{weather}
+
+-------------------------
+❓ FARMER'S QUESTION:
+{question}
+
+-------------------------
+✍️ FINAL ANSWER (Simple, Practical, Beginner-Friendly):
+"""
+
+# Weather block inside the prompt
+WEATHER_TEMPLATE = (
+    "\nCurrent Weather in {location}:\n"
+    "- Temperature: {temperature}°C\n"
+    "- Humidity: {humidity}%\n"
+    "- Condition: {description}\n"
+    "- Rainfall: {rainfall}mm\n"
+)
+
+# Pooled keep-alive connections for the weather APIs. Sized for the
+# async/batch paths, where several worker threads fetch at once; a full
+# pool would silently discard connections and redo the TLS handshake.
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        # Retry connection failures, not read timeouts, so a slow API
+        # can't stack several full timeouts on top of each other
+        max_retries=Retry(total=2, read=0, backoff_factor=0.2),
+    ),
+)
+
+def _geocode(city):
+    geo_url = f"https://geocoding-api.open-meteo.com/v1/search?name={city}&count=1"
+    g = _loads(_SESSION.get(geo_url, timeout=10).content)
+
+    if "results" not in g or len(g["results"]) == 0:
+        return None
+
+    return g["results"][0]["latitude"], g["results"][0]["longitude"]
+
+def _load_geo_cache():
+    try:
+        with open(GEO_CACHE_FILE) as f:
+            return {k: tuple(v) for k, v in json.load(f).items()}
+    except (OSError, ValueError):
+        # Missing or corrupt file — start over, it's only a cache
+        return {}
+
+def _save_geo_cache(cache):
+    # Write a per-process temp file and swap it in, so an interrupted
+    # write (or another process) never leaves a truncated file behind
+    tmp_path = f"{GEO_CACHE_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, GEO_CACHE_FILE)
+
+# Errors raise (and so are never cached); only real responses are memoized
+@functools.lru_cache(maxsize=64)
+def _fetch_forecast(lat, lon, hour_bucket):
+    weather_url = (
+        f"https://api.open-meteo.com/v1/forecast?"
+        f"latitude={lat}&longitude={lon}&current_weather=true"
+    )
+
+    w = _loads(_SESSION.get(weather_url, timeout=3).content)
+
+    if "current_weather" not in w:
+        # Raise rather than return None, or lru_cache keeps "no weather"
+        # for the rest of the hour
+        raise ValueError("forecast response has no current_weather")
+
+    cw = w["current_weather"]
+    wcode = cw.get("weathercode", 0)
+
+    return {
+        "temperature": cw.get("temperature", "N/A"),
+        "humidity": "N/A",
+        "description": WEATHER_CODES.get(wcode, "Not available"),
+        "rainfall": cw.get("rain", 0),
+    }
+
+def _unit_rows(embeddings):
+    Q = np.asarray(embeddings, dtype=np.float32)
+    return Q / np.clip(np.linalg.norm(Q, axis=1, keepdims=True), 1e-12, None)
+
 class AgriAssistQuery:
-    def __init__(self):
+    def __init__(self, embedding_model=None):
         print("🌱 Loading AgriAssist (Gemini 2.5 Pro Edition)...")
 
         # Load API key
@@ -41,13 +195,10 @@ class AgriAssistQuery:
         # Init Gemini
         genai.configure(api_key=api_key)
 
-        # Load Gemini 2.5 Pro model
-        self.model = genai.GenerativeModel("models/gemini-2.5-pro")
-
-        # Load embeddings
-        self.embedding_model = SentenceTransformerEmbeddings(
-            model_name="all-MiniLM-L6-v2"
-        )
+        # Embeddings shared with ingest when passed in; otherwise the
+        # model, DB and vector files load lazily on first use.
+        if embedding_model is not None:
+            self.embedding_model = embedding_model
 
         # Ensure DB exists
         if not os.path.exists(DB_DIRECTORY):
@@ -55,51 +206,135 @@ class AgriAssistQuery:
                 f"❌ DB folder not found at '{DB_DIRECTORY}'. Run ingest.py first."
             )
 
+        # Exact prompt cache + in-process paraphrase cache
+        # (the persistent Chroma one sits behind it, see answer_cache)
+        self.llm_cache = LLMCache()
+        self.memory_cache = SemanticLRUCache()
+
+        # Near-duplicate queries reuse the previous neighbour list
+        self.doc_cache = SemanticLRUCache(
+            capacity=DOC_CACHE_CAPACITY, threshold=DOC_CACHE_THRESHOLD, ttl=None
+        )
+
+        # Geocoding results (static per city)
+        self._geo_lock = threading.Lock()
+        self._geo_cache = _load_geo_cache()
+
+        # Worker threads for I/O that overlaps the main pipeline
+        self._pool = ThreadPoolExecutor(max_workers=4)
+        # Chroma search shards get their own workers, so a pending weather
+        # fetch on _pool never holds one of them up
+        self._search_pool = ThreadPoolExecutor(max_workers=SEARCH_SHARDS)
+
+        # Background event loop for the async pipeline
+        self._gemini_slots = asyncio.Semaphore(MAX_INFLIGHT_GENERATIONS)
+        # Concurrent requests (up to 16, within 30 ms) are dispatched
+        # together; a lone request goes out immediately
+        self._batcher = DynamicBatcher(self._generate_batch)
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+
+    # -----------------------------------------------------------
+    # 💤 LAZY RESOURCES (built on first access)
+    # -----------------------------------------------------------
+    @functools.cached_property
+    def model(self):
+        # Load Gemini 2.5 Pro model
+        model = genai.GenerativeModel("models/gemini-2.5-pro")
+        print("✅ Gemini 2.5 Pro Ready")
+        return model
+
+    @functools.cached_property
+    def embedding_model(self):
+        return load_embedding_model()
+
+    @functools.cached_property
+    def db(self):
         # Load Chroma vector DB
-        self.db = Chroma(
+        db = Chroma(
             persist_directory=DB_DIRECTORY,
             embedding_function=self.embedding_model
         )
-
         print("✅ Vector DB Loaded")
-        print("✅ Gemini 2.5 Pro Ready")
+        return db
+
+    @functools.cached_property
+    def answer_cache(self):
+        return SemanticAnswerCache()
+
+    @functools.cached_property
+    def _persisted_vectors(self):
+        # Precomputed chunk vectors (only trusted if they match Chroma)
+        vectors, vector_ids = load_vectors_mmap(DB_DIRECTORY)
+        if vectors is None:
+            return None, None, None
+        if len(vector_ids) != self.db._collection.count():
+            print("⚠️ embeddings.npy is out of sync with Chroma — re-run ingest.py")
+            return None, None, None
+
+        # Optional FAISS ANN index over the same rows (large corpora)
+        faiss_index = load_faiss_index(DB_DIRECTORY)
+        if faiss_index is not None and faiss_index.ntotal != len(vector_ids):
+            print("⚠️ faiss.index is out of sync with Chroma — re-run ingest.py")
+            faiss_index = None
+
+        return vectors, vector_ids, faiss_index
+
+    @property
+    def vectors(self):
+        return self._persisted_vectors[0]
+
+    @property
+    def vector_ids(self):
+        return self._persisted_vectors[1]
+
+    @property
+    def faiss_index(self):
+        return self._persisted_vectors[2]
+
+    # -----------------------------------------------------------
+    # 🔥 WARMUP (load HNSW index + encoder before first question)
+    # -----------------------------------------------------------
+    def warmup(self):
+        try:
+            self.model
+            embedding = self.embedding_model.embed_query("wheat")
+            self.db.similarity_search_by_vector(embedding, k=1)
+            # Opens the mmap'd vector matrix / FAISS index as well
+            self._persisted_vectors
+        except Exception as e:
+            print(f"⚠️ Warmup skipped: {e}")
 
     # -----------------------------------------------------------
     # 🌧️ OPEN-METEO WEATHER (SAFE + RELIABLE)
     # -----------------------------------------------------------
+    def _coordinates(self, city):
+        key = city.strip().lower()
+        coords = self._geo_cache.get(key)
+        if coords is not None:
+            return coords
+
+        coords = _geocode(key)
+        if coords is None:
+            return None
+
+        # City → lat/lon never changes, so keep it across restarts
+        with self._geo_lock:
+            self._geo_cache[key] = coords
+            _save_geo_cache(self._geo_cache)
+        return coords
+
     def get_weather(self, city="Delhi"):
         try:
             # Step 1: Convert city to latitude & longitude
-            geo_url = f"https://geocoding-api.open-meteo.com/v1/search?name={city}&count=1"
-            g = requests.get(geo_url, timeout=10).json()
-
-            if "results" not in g or len(g["results"]) == 0:
+            coords = self._coordinates(city)
+            if coords is None:
                 print("⚠️ City not found in geocoding")
                 return None
 
-            lat = g["results"][0]["latitude"]
-            lon = g["results"][0]["longitude"]
-
-            # Step 2: Fetch weather
-            weather_url = (
-                f"https://api.open-meteo.com/v1/forecast?"
-                f"latitude={lat}&longitude={lon}&current_weather=true"
-            )
-
-            w = requests.get(weather_url, timeout=10).json()
-
-            if "current_weather" not in w:
-                return None
-
-            cw = w["current_weather"]
-            wcode = cw.get("weathercode", 0)
-
-            return {
-                "temperature": cw.get("temperature", "N/A"),
-                "humidity": "N/A",
-                "description": WEATHER_CODES.get(wcode, "Not available"),
-                "rainfall": cw.get("rain", 0),
-            }
+            # Step 2: Fetch weather (same place within the same hour → reuse)
+            lat, lon = coords
+            return _fetch_forecast(lat, lon, weather_hour())
 
         except Exception as e:
             print(f"⚠️ Weather API error: {e}")
@@ -109,79 +344,390 @@ class AgriAssistQuery:
     # 🔍 VECTOR SEARCH
     # -----------------------------------------------------------
     def search_documents(self, query, k=3):
-        return self.db.similarity_search_with_score(query, k=k)
+        return self.search_documents_by_vector(
+            self.embedding_model.embed_query(query), k=k
+        )
+
+    def search_documents_by_vector(self, query_embedding, k=3):
+        # Callers that already embedded the question pass it straight in
+        return self.search_documents_batch([query_embedding], k=k)[0]
+
+    def search_documents_batch(self, query_embeddings, k=3):
+        results = [self.doc_cache.get(e, scope=k) for e in query_embeddings]
+        misses = [i for i, r in enumerate(results) if r is None]
+        if not misses:
+            return results
+
+        # All cache misses go to the index in one batched call
+        miss_embeddings = [query_embeddings[i] for i in misses]
+        if self.vectors is not None and len(self.vector_ids) <= BRUTE_FORCE_MAX_VECTORS:
+            found = self._search_vectors(miss_embeddings, k)
+        elif self.faiss_index is not None:
+            found = self._search_faiss(miss_embeddings, k)
+        else:
+            found = self._query_collection_parallel(miss_embeddings, k)
+
+        for i, r in zip(misses, found):
+            results[i] = r
+            self.doc_cache.put(query_embeddings[i], r, scope=k)
+        return results
+
+    def _query_collection_parallel(self, query_embeddings, k):
+        # The matrix / FAISS paths score a whole batch in one BLAS call; for
+        # Chroma, shard the batch so HNSW search and SQLite fetches overlap
+        # (both release the GIL).
+        if len(query_embeddings) < 2 * SEARCH_SHARDS:
+            return self._query_collection(query_embeddings, k)
+
+        size = -(-len(query_embeddings) // SEARCH_SHARDS)
+        shards = [
+            query_embeddings[i:i + size]
+            for i in range(0, len(query_embeddings), size)
+        ]
+        found = self._search_pool.map(lambda shard: self._query_collection(shard, k), shards)
+        return [r for shard_results in found for r in shard_results]
+
+    def _query_collection(self, query_embeddings, k):
+        hits = self.db._collection.query(
+            query_embeddings=np.asarray(query_embeddings, dtype=np.float32),
+            n_results=k,
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            [
+                (Document(page_content=doc, metadata=meta or {}), dist)
+                for doc, meta, dist in zip(docs, metas, dists)
+            ]
+            for docs, metas, dists in zip(
+                hits["documents"], hits["metadatas"], hits["distances"]
+            )
+        ]
+
+    def _search_vectors(self, query_embeddings, k):
+        Q = _unit_rows(query_embeddings)
+
+        # One (N × d) · (d × B) product scores every query at once
+        sims = (self.vectors @ Q.T).T
+        k = min(k, sims.shape[1])
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(
+            top, np.argsort(-np.take_along_axis(sims, top, axis=1), axis=1), axis=1
+        )
+
+        # Same scale as Chroma's "ip" distance (1 − dot) on unit vectors
+        dists = 1.0 - np.take_along_axis(sims, top, axis=1)
+        return self._rows_to_documents(top, dists)
+
+    def _search_faiss(self, query_embeddings, k):
+        scores, rows = self.faiss_index.search(_unit_rows(query_embeddings), k)
+        # Inner-product index returns similarities → 1 − dot distance
+        return self._rows_to_documents(rows, 1.0 - scores)
+
+    def _rows_to_documents(self, rows, distances):
+        # Matrix rows → Chroma ids → stored text + metadata (one fetch)
+        ids = sorted({self.vector_ids[j] for row in rows for j in row if j >= 0})
+        got = self.db._collection.get(ids=ids, include=["documents", "metadatas"])
+        by_id = dict(zip(got["ids"], zip(got["documents"], got["metadatas"])))
+
+        batch_results = []
+        for row, row_dists in zip(rows, distances):
+            results = []
+            for j, dist in zip(row, row_dists):
+                vid = self.vector_ids[j] if j >= 0 else None
+                if vid in by_id:
+                    doc, meta = by_id[vid]
+                    results.append((
+                        Document(page_content=doc, metadata=meta or {}),
+                        float(dist),
+                    ))
+            batch_results.append(results)
+        return batch_results
 
     # -----------------------------------------------------------
     # 🤖 MAIN RAG PIPELINE — Gemini 2.5 Pro
     # -----------------------------------------------------------
-    def answer_query(self, question, location="Delhi", include_weather=True):
+    def generate(self, prompt):
+        cached = self.llm_cache.get(prompt)
+        if cached is not None:
+            return cached
 
-        # 1. Retrieve PDF context
-        results = self.search_documents(question)
+        try:
+            response = self.model.generate_content([prompt])
+            answer = response.text.strip()
+        except Exception as e:
+            print(f"⚠️ Gemini Error: {e}")
+            return None
+
+        self.llm_cache.set(prompt, answer)
+        return answer
+
+    async def agenerate(self, prompt):
+        # SQLite lookups stay off the shared event loop
+        cached = await asyncio.to_thread(self.llm_cache.get, prompt)
+        if cached is not None:
+            return cached
+
+        try:
+            answer = await self._on_own_loop(self._batcher.submit(prompt))
+        except Exception as e:
+            print(f"⚠️ Gemini Error: {e}")
+            return None
+
+        await asyncio.to_thread(self.llm_cache.set, prompt, answer)
+        return answer
 
+    async def _generate_batch(self, prompts):
+        # This Gemini SDK has no batch endpoint, so a coalesced batch is
+        # fired concurrently; swap this for a batch-capable server if needed.
+        return await asyncio.gather(
+            *(self._call_gemini(p) for p in prompts), return_exceptions=True
+        )
+
+    async def _call_gemini(self, prompt):
+        async with self._gemini_slots:
+            response = await self.model.generate_content_async([prompt])
+        return response.text.strip()
+
+    async def agenerate_many(self, prompts):
+        # Fan out up to MAX_INFLIGHT_GENERATIONS concurrent Gemini calls
+        return await asyncio.gather(*(self.agenerate(p) for p in prompts))
+
+    def _build_context(self, results):
         context_blocks = []
         sources = []
+        seen = set()
+
+        for doc, score in results:
+            # Collapse PDF whitespace runs and cap length to cut prompt tokens
+            content = _WHITESPACE.sub(" ", doc.page_content).strip()[:MAX_CONTEXT_CHARS]
+
+            # Overlapping chunks often start identically — keep the first
+            fingerprint = content[:FINGERPRINT_CHARS].lower()
+            if not content or fingerprint in seen:
+                continue
+            seen.add(fingerprint)
 
-        for i, (doc, score) in enumerate(results, 1):
             context_blocks.append(
-                f"Source {i}:\n{doc.page_content.strip()}\n"
+                f"Source {len(context_blocks) + 1}:\n{content}\n"
+            )
+            # Stored at ingest; older DBs only have the full source path
+            basename = doc.metadata.get("basename") or os.path.basename(
+                doc.metadata.get("source", "Unknown")
             )
-            src = doc.metadata.get("source", "Unknown")
             page = doc.metadata.get("page", "N/A")
-            sources.append(f"{os.path.basename(src)} — Page {page}")
+            sources.append(f"{basename} — Page {page}")
 
-        context_text = "\n\n".join(context_blocks)
+        return "\n\n".join(context_blocks), sources
 
-        # 2. Weather context
-        weather_info = None
-        weather_text = ""
-
-        if include_weather:
-            weather_info = self.get_weather(location)
-            if weather_info:
-                weather_text = (
-                    f"\nCurrent Weather in {location}:\n"
-                    f"- Temperature: {weather_info['temperature']}°C\n"
-                    f"- Humidity: {weather_info['humidity']}%\n"
-                    f"- Condition: {weather_info['description']}\n"
-                    f"- Rainfall: {weather_info['rainfall']}mm\n"
-                )
+    def _format_weather(self, weather_info, location):
+        if not weather_info:
+            return ""
 
-        # 3. Build prompt
-        prompt = f"""
-You are AgriAssist, an agricultural expert for Indian farmers.
-Provide clear, practical, and reliable guidance based ONLY on the given PDF context and weather.
+        return WEATHER_TEMPLATE.format(location=location, **weather_info)
 
--------------------------
-📘 PDF CONTEXT:
-{context_text}
+    def _build_prompt(self, context_text, weather_text, question):
+        return PROMPT_TEMPLATE.format(
+            context=context_text, weather=weather_text, question=question
+        )
 
--------------------------
-🌦 WEATHER CONTEXT:
-{weather_text}
+    def _cached_answer(self, query_embedding, location, include_weather):
+        scope = answer_scope(location, include_weather)
+        hit = self.memory_cache.get(query_embedding, scope=scope)
+        if hit is not None:
+            return hit
 
--------------------------
-❓ FARMER'S QUESTION:
-{question}
+        hit = self.answer_cache.lookup(query_embedding, location, include_weather)
+        if hit is None:
+            return None
 
--------------------------
-✍️ FINAL ANSWER (Simple, Practical, Beginner-Friendly):
-"""
+        # Promote to the in-process cache, keeping the original age
+        result, created = hit
+        self.memory_cache.put(query_embedding, result, scope=scope, created=created)
+        return result
 
-        # 4. Generate answer using Gemini 2.5 Pro
-        try:
-            response = self.model.generate_content([prompt])
-            answer = response.text.strip()
-        except Exception as e:
-            print(f"⚠️ Gemini Error: {e}")
-            answer = "The system could not generate an answer. Please try again."
+    def _finish(self, question, query_embedding, location, include_weather,
+                answer, sources, weather_info):
+        if answer is None:
+            return {
+                "answer": "The system could not generate an answer. Please try again.",
+                "sources": sources,
+                "weather": weather_info,
+                "location": location,
+            }
 
-        return {
+        result = {
             "answer": answer,
             "sources": sources,
             "weather": weather_info,
             "location": location,
         }
+        self.memory_cache.put(
+            query_embedding, result, scope=answer_scope(location, include_weather)
+        )
+        self.answer_cache.add(
+            question, query_embedding, location, include_weather, result
+        )
+        return result
+
+    def _await_weather(self, weather_future):
+        if weather_future is None:
+            return None
+        try:
+            return weather_future.result(timeout=WEATHER_WAIT_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            print("⚠️ Weather API timed out")
+            return None
+
+    def answer_query(self, question, location="Delhi", include_weather=True):
+
+        # Weather is independent of the question — fetch it in the
+        # background so its round-trip hides behind embedding + search.
+        weather_future = (
+            self._pool.submit(self.get_weather, location) if include_weather else None
+        )
+
+        # 0. Near-duplicate questions reuse a recent answer
+        query_embedding = self.embedding_model.embed_query(question)
+        cached = self._cached_answer(query_embedding, location, include_weather)
+        if cached is not None:
+            if weather_future:
+                weather_future.cancel()
+            return cached
+
+        # 1. Retrieve PDF context
+        results = self.search_documents_by_vector(query_embedding)
+        context_text, sources = self._build_context(results)
+
+        # 2. Weather context
+        weather_info = self._await_weather(weather_future)
+        weather_text = self._format_weather(weather_info, location)
+
+        # 3. Build prompt
+        prompt = self._build_prompt(context_text, weather_text, question)
+
+        # 4. Generate answer using Gemini 2.5 Pro
+        answer = self.generate(prompt)
+        return self._finish(
+            question, query_embedding, location, include_weather,
+            answer, sources, weather_info
+        )
+
+    # -----------------------------------------------------------
+    # 📦 BATCH PIPELINE (one encoder pass + one index call)
+    # -----------------------------------------------------------
+    def batch_answer_query(self, questions, location="Delhi", include_weather=True):
+        # Indexed again below, so a generator must be materialized once
+        questions = list(questions)
+
+        weather_future = (
+            self._pool.submit(self.get_weather, location) if include_weather else None
+        )
+
+        # One transformer forward pass for every question
+        query_embeddings = self.embedding_model.embed_documents(questions)
+
+        answers = [
+            self._cached_answer(e, location, include_weather) for e in query_embeddings
+        ]
+        pending = [i for i, a in enumerate(answers) if a is None]
+        if not pending:
+            if weather_future:
+                weather_future.cancel()
+            return answers
+
+        all_results = self.search_documents_batch(
+            [query_embeddings[i] for i in pending]
+        )
+
+        weather_info = self._await_weather(weather_future)
+        weather_text = self._format_weather(weather_info, location)
+
+        contexts = [self._build_context(results) for results in all_results]
+        prompts = [
+            self._build_prompt(context_text, weather_text, questions[i])
+            for i, (context_text, _) in zip(pending, contexts)
+        ]
+        generated = self.run_async(self.agenerate_many(prompts))
+
+        for i, (_, sources), answer in zip(pending, contexts, generated):
+            answers[i] = self._finish(
+                questions[i], query_embeddings[i], location, include_weather,
+                answer, sources, weather_info
+            )
+        return answers
+
+    # -----------------------------------------------------------
+    # ⚡ ASYNC PIPELINE (many questions in flight at once)
+    # -----------------------------------------------------------
+    async def aanswer_query(self, question, location="Delhi", include_weather=True):
+        return await self._on_own_loop(
+            self._aanswer_query(question, location, include_weather)
+        )
+
+    async def _aanswer_query(self, question, location, include_weather):
+        # Weather doesn't depend on the question — start it right away
+        # so its network round-trip hides behind embedding + retrieval.
+        weather_task = (
+            asyncio.create_task(asyncio.to_thread(self.get_weather, location))
+            if include_weather else None
+        )
+
+        query_embedding = await asyncio.to_thread(
+            self.embedding_model.embed_query, question
+        )
+        # Cache lookups and writes hit Chroma + SQLite — keep them off the
+        # loop too, or concurrent questions serialize on disk I/O
+        cached = await asyncio.to_thread(
+            self._cached_answer, query_embedding, location, include_weather
+        )
+        if cached is not None:
+            if weather_task:
+                weather_task.cancel()
+            return cached
+
+        results = await asyncio.to_thread(
+            self.search_documents_by_vector, query_embedding
+        )
+        weather_info = await self._await_weather_task(weather_task)
+
+        context_text, sources = self._build_context(results)
+        weather_text = self._format_weather(weather_info, location)
+        prompt = self._build_prompt(context_text, weather_text, question)
+
+        answer = await self.agenerate(prompt)
+        return await asyncio.to_thread(
+            self._finish, question, query_embedding, location, include_weather,
+            answer, sources, weather_info
+        )
+
+    async def _await_weather_task(self, weather_task):
+        # Same cap as the sync path's _await_weather
+        if weather_task is None:
+            return None
+        try:
+            return await asyncio.wait_for(weather_task, WEATHER_WAIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            print("⚠️ Weather API timed out")
+            return None
+
+    async def abatch_answer_query(self, questions, location="Delhi", include_weather=True):
+        return await asyncio.gather(*(
+            self.aanswer_query(q, location, include_weather) for q in questions
+        ))
+
+    def run_async(self, coro):
+        # Gemini's async client binds to the first event loop it sees,
+        # so every coroutine runs on one long-lived background loop.
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _on_own_loop(self, coro):
+        # Awaited from another loop (e.g. asyncio.run) — hop onto ours so the
+        # batcher, semaphore and Gemini client never see a second loop
+        if asyncio.get_running_loop() is self._loop:
+            return await coro
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(coro, self._loop)
+        )
 
 # Test Mode
 if __name__ == "__main__":